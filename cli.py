@@ -1,27 +1,30 @@
 import os
 import time
 import dotenv
-import keyboard
+import threading
 import webbrowser
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 
 import typer
 from rich.text import Text
+from rich.live import Live
 from rich.align import Align
+from rich.layout import Layout
 from rich.panel import Panel
-from rich.console import Console
+from rich.console import Console, Group
 from rich.prompt import Prompt, Confirm
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
-from utils.arxiv import query_arxiv
-from utils.ranking import rank_papers
-from utils.helpers import parse_query_with_llm
+from utils import cache
 
 
 app = typer.Typer()
 console = Console()
 dotenv.load_dotenv()  # Load environment variables
 
+TOP_K = 30  # Papers shown per search, best first
+PREFETCH_AHEAD = 3  # Papers after the current one to fetch citation data for
+
 
 def pause(seconds=1):
     time.sleep(seconds)
@@ -34,33 +37,24 @@ def display_paper(paper, index, is_selected=False):
     title_style = "bold yellow on black" if is_selected else "bold cyan"
     
     # Create panel title with index and title
-    title = f"[{index}] [{title_style}]{paper['title']}[/{title_style}]"
+    title = f"[{index}] [{title_style}]{paper.title}[/{title_style}]"
     
     # Add selection indicator
     # if is_selected:   title = "➤ " + title
     
-    # Format authors
-    authors = ", ".join(paper['authors'][:5])
-    if len(paper['authors']) > 5:
-        authors += "..."
-    
     # Format citation info if available
     citation_info = ""
-    if 'citation_data' in paper:
-        cites = paper['citation_data'].get('citation_count', 'N/A')
+    if paper.citation_data is not None:
+        cites = paper.citation_data.get('citation_count', 'N/A')
         citation_info = f"\n[bold yellow]Citations:[/bold yellow] {cites}"
     
     # Format content
-    content = f"[bold magenta]Authors:[/bold magenta] {authors}\n"
-    content += f"[bold green]Published:[/bold green] {paper['published'][:10]}\n"
-    content += f"[bold blue]arXiv ID:[/bold blue] {paper['id']}{citation_info}\n"
-    content += f"[bold]PDF:[/bold] {paper['pdf_link']}\n\n"
+    content = f"[bold magenta]Authors:[/bold magenta] {paper.authors_short}\n"
+    content += f"[bold green]Published:[/bold green] {paper.pub_date}\n"
+    content += f"[bold blue]arXiv ID:[/bold blue] {paper.id}{citation_info}\n"
+    content += f"[bold]PDF:[/bold] {paper.pdf_link}\n\n"
     
-    # Format abstract (first 300 chars with ellipsis)
-    abstract = paper['abstract']
-    if len(abstract) > 300:
-        abstract = abstract[:300] + "..."
-    content += f"[italic]{abstract}[/italic]"
+    content += f"[italic]{paper.abstract_short}[/italic]"
     
     # Create and return the panel with different border style if selected
     return Panel(
@@ -71,38 +65,134 @@ def display_paper(paper, index, is_selected=False):
     )
 
 
-def display_papers_page(papers, page):
-    """Display a single paper per page with pagination"""
-    total_pages = len(papers)
-    idx = page  # Using page as direct index (adjusted from 1-based to 0-based later)
+def prefetch_citations(pool, papers, page, futures):
+    """Fetch citation data in the background for the current page and the next few papers"""
+    from utils.helpers import get_citation_data
+
+    for idx in range(page - 1, min(page + PREFETCH_AHEAD, len(papers))):
+        if papers[idx].citation_data is None and idx not in futures:
+            futures[idx] = pool.submit(get_citation_data, papers[idx].id, background=True)
+            futures[idx].add_done_callback(wake_key_reader)
+
+
+def collect_citations(papers, panels, page, futures, wait=False):
+    """
+    Attach prefetched citation data to the paper on the given page, rebuilding its panel.
     
-    # Clear the console before displaying anything
-    console.clear()
-    console.print(f"\n[bold cyan]Paper {page}/{total_pages}[/bold cyan]\n")
+    Args:
+        wait (bool): Give an unfinished prefetch a moment to complete (when the page was just shown)
+    
+    Returns:
+        bool: True if the page's panel changed
+    """
+    idx = page - 1
+    future = futures.get(idx)
+    if future is None or papers[idx].citation_data is not None:
+        return False
+    if not wait and not future.done():
+        return False
+    try:
+        data = future.result(timeout=0.1)
+    except TimeoutError:
+        return False
+    except Exception:
+        data = {'error': 'prefetch failed'}
+    if 'error' in data:
+        del futures[idx]  # Allow a retry on the next prefetch
+        return False
+    papers[idx].citation_data = data
+    panels[idx] = display_paper(papers[idx], page, True)
+    return True
+
+
+def make_layout():
+    """Create the paging layout with a header, the current paper and the navigation help"""
+    layout = Layout()
+    layout.split_column(
+        Layout(name="header", size=2),
+        Layout(name="body"),
+        Layout(name="footer", size=1)
+    )
+    return layout
+
+
+def display_papers_page(layout, panels, page, status=""):
+    """Display a single paper per page with pagination, updating only the layout regions"""
+    total_pages = len(panels)
+    
+    layout["header"].update(Text.from_markup(f"\n[bold cyan]Paper {page}/{total_pages}[/bold cyan]"))
     
     # Display the current paper (always selected)
     paper_idx = page - 1  # Convert to 0-based index
-    if 0 <= paper_idx < len(papers):
-        console.print(display_paper(papers[paper_idx], page, True))
+    if 0 <= paper_idx < total_pages:
+        layout["body"].update(panels[paper_idx])
     
-    # Navigation help
-    console.print("\n[bold yellow]Navigation:[/bold yellow]")
-    console.print("[dim]→/← or Right/Left Arrow: Next/Previous paper")
-    console.print("[dim]Enter: Open current paper's PDF")
-    console.print("[dim]D: Show detailed view of current paper")
-    console.print("[dim]Space: Start a new search")
-    console.print("[dim]Q: Quit[/dim]")
+    # Navigation help on one line, plus the status only when there is one, so the paper keeps the screen
+    footer = (
+        "[bold yellow]Keys:[/bold yellow] "
+        "[dim]→/← Next/Previous · Enter Open PDF · D Details · Space New search · Q Quit[/dim]"
+    )
+    if status:
+        footer += f"\n{status}"
+    layout["footer"].size = 2 if status else 1
+    layout["footer"].update(Text.from_markup(footer))
     return total_pages
 
 
+# prompt_toolkit key -> name returned by handle_keyboard_input
+KEY_NAMES = {
+    'left': 'left', 'right': 'right', 'enter': 'enter', 'space': 'space', 'escape': 'esc',
+    'q': 'q', 'Q': 'q', 'd': 'd', 'D': 'd', 'o': 'o', 'O': 'o',
+    'n': 'n', 'N': 'n', 'p': 'p', 'P': 'p',
+}
+
+_key_reader = None
+_wake_pending = threading.Event()
+
+
+def _get_key_reader():
+    """Build (once) a headless prompt_toolkit application that exits with the name of the pressed key"""
+    global _key_reader
+    if _key_reader is None:
+        from prompt_toolkit.application import Application
+        from prompt_toolkit.key_binding import KeyBindings
+        from prompt_toolkit.layout import Layout as KeyLayout, Window
+        from prompt_toolkit.output import DummyOutput
+
+        bindings = KeyBindings()
+        for key, name in KEY_NAMES.items():
+            bindings.add(key)(lambda event, name=name: event.app.exit(result=name))
+        bindings.add('c-c')(lambda event: event.app.exit(exception=KeyboardInterrupt))
+
+        # Rich owns the screen, so the application renders nothing
+        _key_reader = Application(layout=KeyLayout(Window()), key_bindings=bindings, output=DummyOutput())
+        _key_reader.ttimeoutlen = 0.05  # Don't hold a lone Escape waiting for a key sequence
+    return _key_reader
+
+
+def _exit_if_woken():
+    """Stop the key reader with no key if a wake-up is pending (runs on the reader's event loop)"""
+    if _wake_pending.is_set() and _key_reader.future is not None and not _key_reader.future.done():
+        _wake_pending.clear()
+        _key_reader.exit(result=None)
+
+
+def wake_key_reader(*_):
+    """Make a pending or the next handle_keyboard_input() call return None; safe from any thread"""
+    _wake_pending.set()
+    loop = _key_reader.loop if _key_reader is not None else None
+    if loop is not None:
+        try:
+            loop.call_soon_threadsafe(_exit_if_woken)
+        except RuntimeError:
+            pass  # The reader just finished; its next run picks up the wake-up
+
+
 def handle_keyboard_input():
     """Wait for keyboard input with better error handling"""
     try:
-        # Wait for a key event
-        key_event = keyboard.read_event(suppress=True)
-        if key_event.event_type == keyboard.KEY_DOWN:
-            return key_event.name.lower()
-        return None
+        # Wait for a key press in the terminal (no global keyboard hook or root needed)
+        return _get_key_reader().run(pre_run=_exit_if_woken)
     except Exception as e:
         console.print(f"[dim]Keyboard input error: {str(e)}[/dim]")
         return None
@@ -112,48 +202,53 @@ def show_paper_details(paper):
     """Show detailed view of a single paper"""
     console.clear()
     
+    body = []
+    
     # Title
-    console.print(f"[bold cyan]{paper['title']}[/bold cyan]\n")
+    body.append(f"[bold cyan]{paper.title}[/bold cyan]\n")
     
     # Authors (all of them)
-    console.print("[bold magenta]Authors:[/bold magenta]")
-    for author in paper['authors']:
-        console.print(f"• {author}")
+    body.append("[bold magenta]Authors:[/bold magenta]")
+    for author in paper.authors:
+        body.append(f"• {author}")
     
     # Metadata
-    console.print(f"\n[bold green]Published:[/bold green] {paper['published'][:10]}")
-    console.print(f"[bold blue]arXiv ID:[/bold blue] {paper['id']}")
-    console.print(f"[bold]URL:[/bold] https://arxiv.org/abs/{paper['id']}")
-    console.print(f"[bold]PDF:[/bold] {paper['pdf_link']}")
+    body.append(f"\n[bold green]Published:[/bold green] {paper.pub_date}")
+    body.append(f"[bold blue]arXiv ID:[/bold blue] {paper.id}")
+    body.append(f"[bold]URL:[/bold] https://arxiv.org/abs/{paper.id}")
+    body.append(f"[bold]PDF:[/bold] {paper.pdf_link}")
     
     # Categories
-    if 'categories' in paper and paper['categories']:
-        console.print("\n[bold yellow]Categories:[/bold yellow]")
-        for category in paper['categories']:
-            console.print(f"• {category}")
+    if paper.categories:
+        body.append("\n[bold yellow]Categories:[/bold yellow]")
+        for category in paper.categories:
+            body.append(f"• {category}")
     
     # Citation data if available
-    if 'citation_data' in paper:
-        cites = paper['citation_data']
-        console.print("\n[bold yellow]Citation Data:[/bold yellow]")
-        console.print(f"• Citation count: {cites.get('citation_count', 'N/A')}")
-        console.print(f"• Influential citations: {cites.get('influential_citation_count', 'N/A')}")
-        console.print(f"• References: {cites.get('references', 'N/A')}")
-        console.print(f"• Year: {cites.get('year', 'N/A')}")
+    if paper.citation_data is not None:
+        cites = paper.citation_data
+        body.append("\n[bold yellow]Citation Data:[/bold yellow]")
+        body.append(f"• Citation count: {cites.get('citation_count', 'N/A')}")
+        body.append(f"• Influential citations: {cites.get('influential_citation_count', 'N/A')}")
+        body.append(f"• References: {cites.get('references', 'N/A')}")
+        body.append(f"• Year: {cites.get('year', 'N/A')}")
     
     # Abstract
-    console.print("\n[bold]Abstract:[/bold]")
-    console.print(Text(paper['abstract'], style="italic"))
+    body.append("\n[bold]Abstract:[/bold]")
+    body.append(Text(paper.abstract, style="italic"))
     
     # Ranking scores if available
-    if 'scores' in paper:
-        s = paper['scores']
-        console.print("\n[dim italic]Ranking metrics:[/dim italic]")
-        console.print(f"[dim]Relevance: {s['relevance']:.2f} | Citations: {s['citation']:.2f} | " +
-                     f"Recency: {s['recency']:.2f} | Combined: {s['combined']:.2f}[/dim]")
+    if paper.scores:
+        s = paper.scores
+        body.append("\n[dim italic]Ranking metrics:[/dim italic]")
+        body.append(f"[dim]Relevance: {s['relevance']:.2f} | Citations: {s['citation']:.2f} | " +
+                    f"Recency: {s['recency']:.2f} | Combined: {s['combined']:.2f}[/dim]")
     
     # Navigation instructions
-    console.print("\n[dim]Press Enter to go back to results | O to open PDF[/dim]")
+    body.append("\n[dim]Press Enter to go back to results | O to open PDF[/dim]")
+    
+    # Render the whole view in a single print
+    console.print(Group(*body))
     
     while True:
         key = handle_keyboard_input()
@@ -161,7 +256,7 @@ def show_paper_details(paper):
             return
         elif key == 'o':
             try:
-                webbrowser.open(paper['pdf_link'])
+                webbrowser.open(paper.pdf_link)
                 console.print("[dim]Opening PDF in browser...[/dim]")
                 pause(1)
             except Exception as e:
@@ -170,14 +265,18 @@ def show_paper_details(paper):
 
 
 @app.callback(invoke_without_command=True)
-def main(ctx: typer.Context):
+def main(
+    ctx: typer.Context,
+    no_cache: bool = typer.Option(False, "--no-cache", help="Bypass the on-disk cache of API responses"),
+):
     """Main callback to run when no subcommand is used"""
     if ctx.invoked_subcommand is None:
         # If no subcommand is provided, run the start function
-        start()
+        start(no_cache=no_cache)
 
 
-def start():
+def start(no_cache=False):
+    cache.set_enabled(not no_cache)
     console.clear()
 
     # Intro panel with two lines of text
@@ -197,6 +296,12 @@ def start():
     # Print the intro panel with centered content
     console.print(Align.center(intro_panel))
 
+    # Import heavy dependencies only once the intro is on screen
+    from openai import OpenAI
+    from utils.arxiv import query_arxiv
+    from utils.ranking import rank_papers
+    from utils.helpers import parse_query_with_llm
+
     pause(1.5)
 
     search_loop = True
@@ -237,7 +342,7 @@ def start():
                 )
                 
                 # Pass the existing progress object to rank_papers to avoid flickering
-                ranked_papers = rank_papers(papers, topic, use_citations=use_citations, external_progress=progress)
+                ranked_papers = rank_papers(papers, topic, use_citations=use_citations, external_progress=progress, top_k=TOP_K)
             except Exception as e:
                 console.print(f"\n[bold orange1]Error:[/bold orange1] [yellow]{str(e)}[/yellow]")
                 return
@@ -247,7 +352,7 @@ def start():
             continue
         
         # Display search metadata
-        console.print(f"\n[dim]Found {len(ranked_papers)} papers from arXiv (out of {total_results} total matches)[/dim]")
+        console.print(f"\n[dim]Showing the top {len(ranked_papers)} of {len(papers)} papers found on arXiv (out of {total_results} total matches)[/dim]")
         console.print(f"[dim]Using query: {query_params['search_query']}[/dim]")
         
         pause(1)
@@ -255,69 +360,83 @@ def start():
         # Pagination variables - now showing one paper per page
         current_page = 1
         
+        # Render each paper's panel once; paging only swaps the layout body
+        panels = [display_paper(paper, i + 1, True) for i, paper in enumerate(ranked_papers)]
+        layout = make_layout()
+        
+        # Citation data fetched in the background while the user reads, keyed by paper index
+        io_pool = ThreadPoolExecutor(max_workers=4)
+        citation_futures = {}
+        prefetch_citations(io_pool, ranked_papers, current_page, citation_futures)
+        
         # Display initial page
-        total_pages = display_papers_page(ranked_papers, current_page)
+        total_pages = display_papers_page(layout, panels, current_page)
         
-        # Flush any pending key events
+        # Interactive navigation loop with arrow keys
         try:
-            while keyboard.is_pressed("any"):
-                keyboard.read_key(suppress=True)
-                time.sleep(0.1)
-        except:
-            pass
+            with Live(layout, console=console, auto_refresh=False, screen=True) as live:
+                navigation_loop = True
+                while navigation_loop:
+                    # Show citation data that arrived while the user was reading
+                    if collect_citations(ranked_papers, panels, current_page, citation_futures):
+                        display_papers_page(layout, panels, current_page)
+                        live.refresh()
+                    
+                    # Wait for a key press (a finished prefetch wakes this with no key)
+                    key = handle_keyboard_input()
+                    
+                    if not key:
+                        continue
+                        
+                    if key == 'q':
+                        search_loop = False
+                        navigation_loop = False
+                        return  # Exit the application
+                    
+                    elif key == 'space':
+                        # Exit the navigation loop to start a new search
+                        navigation_loop = False
+                    
+                    elif key in ('right', 'n') and current_page < total_pages:
+                        current_page += 1
+                        # Display the new page and prefetch the ones after it
+                        collect_citations(ranked_papers, panels, current_page, citation_futures, wait=True)
+                        display_papers_page(layout, panels, current_page)
+                        live.refresh()
+                        prefetch_citations(io_pool, ranked_papers, current_page, citation_futures)
+                    
+                    elif key in ('left', 'p') and current_page > 1:
+                        current_page -= 1
+                        # Display the new page
+                        collect_citations(ranked_papers, panels, current_page, citation_futures, wait=True)
+                        display_papers_page(layout, panels, current_page)
+                        live.refresh()
+                    
+                    elif key in ('enter', 'o'):
+                        # Open the PDF for the current paper
+                        paper_idx = current_page - 1
+                        if 0 <= paper_idx < len(ranked_papers):
+                            try:
+                                pdf_link = ranked_papers[paper_idx].pdf_link
+                                webbrowser.open(pdf_link)
+                                display_papers_page(layout, panels, current_page, "[dim]Opening PDF in browser...[/dim]")
+                            except Exception as e:
+                                display_papers_page(layout, panels, current_page, f"[bold red]Error opening PDF:[/bold red] {str(e)}")
+                            live.refresh()
+                    
+                    elif key == 'd':
+                        # Show details for current paper outside of the live display
+                        paper_idx = current_page - 1
+                        if 0 <= paper_idx < len(ranked_papers):
+                            live.stop()
+                            show_paper_details(ranked_papers[paper_idx])
+                            live.start(refresh=True)
+        finally:
+            # Drop prefetches that haven't started and don't wait for running ones;
+            # finished ones are already cached on disk
+            io_pool.shutdown(wait=False, cancel_futures=True)
         
-        # Interactive navigation loop with arrow keys
-        navigation_loop = True
-        while navigation_loop:
-            # Wait for a key press
-            key = handle_keyboard_input()
-            
-            if not key:
-                continue
-                
-            if key == 'q':
-                search_loop = False
-                navigation_loop = False
-                return  # Exit the application
-            
-            elif key == 'space':
-                # Exit the navigation loop to start a new search
-                navigation_loop = False
-                console.clear()
-            
-            elif key in ('right', 'n') and current_page < total_pages:
-                current_page += 1
-                # Display the new page
-                display_papers_page(ranked_papers, current_page)
-            
-            elif key in ('left', 'p') and current_page > 1:
-                current_page -= 1
-                # Display the new page
-                display_papers_page(ranked_papers, current_page)
-            
-            elif key in ('enter', 'o'):
-                # Open the PDF for the current paper
-                paper_idx = current_page - 1
-                if 0 <= paper_idx < len(ranked_papers):
-                    try:
-                        pdf_link = ranked_papers[paper_idx]['pdf_link']
-                        webbrowser.open(pdf_link)
-                        console.print("[dim]Opening PDF in browser...[/dim]")
-                        # Redisplay the page after a brief pause
-                        pause(1)
-                        display_papers_page(ranked_papers, current_page)
-                    except Exception as e:
-                        console.print(f"[bold red]Error opening PDF:[/bold red] {str(e)}")
-                        pause(1)
-                        display_papers_page(ranked_papers, current_page)
-            
-            elif key == 'd':
-                # Show details for current paper
-                paper_idx = current_page - 1
-                if 0 <= paper_idx < len(ranked_papers):
-                    show_paper_details(ranked_papers[paper_idx])
-                    # Redisplay the page after viewing details
-                    display_papers_page(ranked_papers, current_page)
+        console.clear()
 
 
 if __name__ == "__main__":
@@ -1,12 +1,65 @@
+import re
 import time
-import feedparser
-import urllib.request
+from dataclasses import dataclass, field
 
 from rich.panel import Panel
 from rich.console import Console
+from utils.cache import disk_cached
+from utils.http import build_session
 
 console = Console()
 
+QUERY_TTL = 24 * 3600  # Search results are refreshed daily
+ARXIV_MIN_INTERVAL = 3  # Seconds between consecutive API requests, per arXiv's guidelines
+ARXIV_TIMEOUT = 30
+
+# Extracts the arXiv ID (without version suffix) from a PDF link
+_ARXIV_ID_RE = re.compile(r'/([^/]+?)(?:v\d+)?$')
+
+# XML namespaces used by the arXiv Atom feed
+NS = {
+    'a': 'http://www.w3.org/2005/Atom',
+    'arxiv': 'http://arxiv.org/schemas/atom',
+    'opensearch': 'http://a9.com/-/spec/opensearch/1.1/',
+}
+
+
+@dataclass(slots=True)
+class Paper:
+    """Metadata for a single arXiv paper, plus the scores and citation data added during ranking"""
+    id: str
+    title: str
+    authors: tuple[str, ...]
+    abstract: str
+    published: str
+    updated: str
+    pdf_link: str
+    categories: tuple[str, ...]
+    primary_category: str | None
+    journal_ref: str | None
+    comment: str | None
+    scores: dict = field(default_factory=dict)
+    citation_data: dict | None = None
+
+    # Display fields, formatted once when the paper is created
+    authors_short: str = field(init=False, repr=False)
+    abstract_short: str = field(init=False, repr=False)
+    pub_date: str = field(init=False, repr=False)
+
+    def __post_init__(self):
+        # Authors (first five with ellipsis)
+        self.authors_short = ", ".join(self.authors[:5]) + ("..." if len(self.authors) > 5 else "")
+
+        # Abstract (first 300 chars with ellipsis)
+        self.abstract_short = self.abstract[:300] + ("..." if len(self.abstract) > 300 else "")
+
+        self.pub_date = self.published[:10]
+
+
+_session = build_session(pool_size=1)
+_last_request_ts = None
+
+@disk_cached('arxiv', ttl=QUERY_TTL)
 def query_arxiv(search_query, start=0, max_results=50, sort_by="relevance"):
     """
     Query the arXiv API for papers matching the search query.
@@ -18,10 +71,12 @@ def query_arxiv(search_query, start=0, max_results=50, sort_by="relevance"):
         sort_by (str): Sort order - 'relevance' or 'lastUpdatedDate'
         
     Returns:
-        list: List of dictionaries containing paper metadata
+        list[Paper]: List of papers matching the query
         int: Total number of results
     """
-    base_url = 'http://export.arxiv.org/api/query?'
+    global _last_request_ts
+
+    base_url = 'https://export.arxiv.org/api/query?'
     
     # Format the query - Handle both "lastUpdatedDate" and "submittedDate" as valid inputs
     if sort_by in ["lastUpdatedDate", "submittedDate"]:
@@ -41,51 +96,49 @@ def query_arxiv(search_query, start=0, max_results=50, sort_by="relevance"):
         border_style="yellow"
     ))
 
+    # Only wait if the previous request was less than ARXIV_MIN_INTERVAL ago
+    if _last_request_ts is not None:
+        time.sleep(max(0, ARXIV_MIN_INTERVAL - (time.monotonic() - _last_request_ts)))
+
     # Perform the request
-    response = urllib.request.urlopen(base_url + query).read()
+    try:
+        http_response = _session.get(base_url + query, timeout=ARXIV_TIMEOUT)
+    finally:
+        _last_request_ts = time.monotonic()
+    http_response.raise_for_status()
+    response = http_response.content
 
-    # Parse the response using feedparser
-    feed = feedparser.parse(response)
+    # Parse the Atom response with lxml
+    from lxml import etree
+    root = etree.fromstring(response)
 
     # Extract paper information
     papers = []
 
-    for entry in feed.entries:
+    for entry in root.iterfind('a:entry', NS):
         # Get PDF link
-        pdf_link = None
-        for link in entry.links:
-            if getattr(link, 'title', None) == 'pdf':
-                pdf_link = link.href
-                break
+        pdf_link = entry.xpath('string(a:link[@title="pdf"]/@href)', namespaces=NS, smart_strings=False) or None
 
         # Get all authors
-        authors = [author.name for author in entry.authors] if hasattr(entry, 'authors') else [entry.author] if hasattr(entry, 'author') else []
+        authors = entry.xpath('a:author/a:name/text()', namespaces=NS, smart_strings=False)
 
         # Get categories
-        categories = [t['term'] for t in entry.tags] if hasattr(entry, 'tags') else []
-
-        # Get journal reference
-        journal_ref = getattr(entry, 'arxiv_journal_ref', None)
-
-        # Get comment
-        comment = getattr(entry, 'arxiv_comment', None)
-
-        paper = {
-            'id': pdf_link.rsplit('/', 1)[-1].split('v', 1)[0],
-            'title': entry.title,
-            'authors': authors,
-            'abstract': entry.summary,
-            'published': entry.published,
-            'updated': entry.updated,
-            'pdf_link': pdf_link,
-            'categories': categories,
-            'primary_category': categories[0] if categories else None,
-            'journal_ref': journal_ref,
-            'comment': comment
-        }
-        papers.append(paper)
+        categories = entry.xpath('a:category/@term', namespaces=NS, smart_strings=False)
 
-    time.sleep(3)   # Be respectful of the API rate limits
+        paper = Paper(
+            id=_ARXIV_ID_RE.search(pdf_link).group(1),
+            title=entry.findtext('a:title', '', NS).strip(),
+            authors=tuple(authors),
+            abstract=entry.findtext('a:summary', '', NS).strip(),
+            published=entry.findtext('a:published', None, NS),
+            updated=entry.findtext('a:updated', None, NS),
+            pdf_link=pdf_link,
+            categories=tuple(categories),
+            primary_category=categories[0] if categories else None,
+            journal_ref=entry.findtext('arxiv:journal_ref', None, NS),
+            comment=entry.findtext('arxiv:comment', None, NS)
+        )
+        papers.append(paper)
 
-    total_results = int(feed.feed.opensearch_totalresults) if hasattr(feed.feed, 'opensearch_totalresults') else 0
+    total_results = int(root.findtext('opensearch:totalResults', 0, NS))
     return papers, total_results
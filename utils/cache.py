@@ -0,0 +1,212 @@
+import time
+import pickle
+import sqlite3
+import hashlib
+import functools
+import threading
+from pathlib import Path
+
+CACHE_DIR = Path.home() / ".cache" / "arxiv-cli"
+CACHE_FILE = CACHE_DIR / "cache.sqlite3"
+SCHEMA_VERSION = 3  # Bump to invalidate every stored entry
+
+_enabled = True
+_connection = None
+_lock = threading.Lock()
+
+
+def set_enabled(enabled: bool):
+    """Enable or disable the on-disk cache for this process"""
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled() -> bool:
+    """Return whether the on-disk cache is in use"""
+    return _enabled
+
+
+def make_key(namespace, *parts) -> str:
+    """
+    Build a cache key from a namespace and the values identifying a request.
+
+    Args:
+        namespace (str): Logical group of the entry (e.g. 'citations')
+        *parts: Values identifying the request (URL, parameters, ...)
+
+    Returns:
+        str: SHA-256 hex digest of the normalized key
+    """
+    raw = "|".join([namespace] + [repr(part) for part in parts])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def call_key(namespace, *args, **kwargs) -> str:
+    """Build the key disk_cached uses for a call with the given arguments"""
+    return make_key(namespace, args, sorted(kwargs.items()))
+
+
+def _connect():
+    global _connection
+    if _connection is None:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        _connection = sqlite3.connect(CACHE_FILE, check_same_thread=False)
+        _connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB, created REAL, expires REAL, schema INTEGER)"
+        )
+        _connection.execute(
+            "CREATE TABLE IF NOT EXISTS vectors ("
+            "idx TEXT, member TEXT, vector BLOB, value BLOB, created REAL, expires REAL, schema INTEGER, "
+            "PRIMARY KEY (idx, member))"
+        )
+        # Drop expired and outdated entries once per process so the file doesn't grow forever
+        try:
+            for table in ("cache", "vectors"):
+                _connection.execute(
+                    f"DELETE FROM {table} WHERE expires < ? OR schema != ?", (time.time(), SCHEMA_VERSION)
+                )
+            _connection.commit()
+        except sqlite3.Error:
+            pass
+    return _connection
+
+
+def load(key):
+    """
+    Look up a cached value.
+
+    Args:
+        key (str): Key returned by make_key
+
+    Returns:
+        The cached value, or None on a miss, an expired entry or a schema mismatch
+    """
+    if not _enabled:
+        return None
+    try:
+        with _lock:
+            row = _connect().execute(
+                "SELECT value, expires, schema FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, expires, schema = row
+        if schema != SCHEMA_VERSION or expires < time.time():
+            return None
+        return pickle.loads(value)
+    except (sqlite3.Error, OSError, pickle.PickleError, EOFError, AttributeError):
+        return None
+
+
+def store(key, value, ttl):
+    """
+    Store a value in the cache.
+
+    Args:
+        key (str): Key returned by make_key
+        value: Any picklable value
+        ttl (float): Time to live in seconds
+    """
+    if not _enabled:
+        return
+    now = time.time()
+    try:
+        with _lock:
+            connection = _connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created, expires, schema) VALUES (?, ?, ?, ?, ?)",
+                (key, pickle.dumps(value), now, now + ttl, SCHEMA_VERSION)
+            )
+            connection.commit()
+    except (sqlite3.Error, OSError, pickle.PickleError):
+        pass  # Caching is best-effort; never fail the caller
+
+
+def load_index(index):
+    """
+    Load the members of a vector index, most recent first.
+
+    Args:
+        index (str): Key returned by make_key naming the index
+
+    Returns:
+        list[tuple[bytes, object]]: The (vector, value) pair of every live member
+    """
+    if not _enabled:
+        return []
+    try:
+        with _lock:
+            rows = _connect().execute(
+                "SELECT vector, value FROM vectors WHERE idx = ? AND expires >= ? AND schema = ? "
+                "ORDER BY created DESC", (index, time.time(), SCHEMA_VERSION)
+            ).fetchall()
+        return [(vector, pickle.loads(value)) for vector, value in rows]
+    except (sqlite3.Error, OSError, pickle.PickleError, EOFError, AttributeError):
+        return []
+
+
+def add_to_index(index, member, vector, value, ttl, max_size=None):
+    """
+    Add (or replace) one member of a vector index.
+
+    Args:
+        index (str): Key returned by make_key naming the index
+        member (str): Identifier of the member within the index
+        vector (bytes): Raw vector stored alongside the value
+        value: Any picklable value
+        ttl (float): Time to live in seconds
+        max_size (int): Keep only this many most recent members (unbounded if None)
+    """
+    if not _enabled:
+        return
+    now = time.time()
+    try:
+        with _lock:
+            connection = _connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO vectors (idx, member, vector, value, created, expires, schema) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (index, member, vector, pickle.dumps(value), now, now + ttl, SCHEMA_VERSION)
+            )
+            if max_size is not None:
+                connection.execute(
+                    "DELETE FROM vectors WHERE idx = ? AND member NOT IN ("
+                    "SELECT member FROM vectors WHERE idx = ? ORDER BY created DESC LIMIT ?)",
+                    (index, index, max_size)
+                )
+            connection.commit()
+    except (sqlite3.Error, OSError, pickle.PickleError):
+        pass  # Caching is best-effort; never fail the caller
+
+
+def disk_cached(namespace, ttl, ignore=()):
+    """
+    Decorator caching a function's return value on disk.
+
+    Args:
+        namespace (str): Logical group for the function's entries
+        ttl: Time to live in seconds, or a callable taking the result and
+            returning the TTL (None means the result is not cached)
+        ignore (tuple): Keyword arguments that do not affect the result
+            and are left out of the cache key
+
+    Returns:
+        callable: The decorator
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key_kwargs = {name: value for name, value in kwargs.items() if name not in ignore}
+            key = call_key(namespace, *args, **key_kwargs)
+            cached = load(key)
+            if cached is not None:
+                return cached
+
+            result = func(*args, **kwargs)
+            result_ttl = ttl(result) if callable(ttl) else ttl
+            if result_ttl:
+                store(key, result, result_ttl)
+            return result
+        return wrapper
+    return decorator
@@ -1,97 +1,107 @@
-import re
+import json
+from concurrent.futures import ThreadPoolExecutor
 import requests
+import numpy as np
 from openai import OpenAI
 from rich.console import Console
 from rich.panel import Panel
+from utils import cache
+from utils.cache import disk_cached
+from utils.http import build_session
 
 # Create a console instance for rich output
 console = Console()
 
-def parse_query_with_llm(user_query, client: OpenAI):
+# Pooled session so requests to Semantic Scholar reuse their TLS connection
+_s2_session = build_session()
+# Background prefetches fail fast instead of retrying, so they never hold up exit
+_s2_background_session = build_session(pool_size=4, retries=0)
+
+CITATION_TTL = 7 * 24 * 3600        # Citation counts change slowly
+CITATION_MISS_TTL = 24 * 3600       # Papers unknown to Semantic Scholar (404)
+
+DEFAULT_CITATION_DATA = {
+    'citation_count': 0,
+    'influential_citation_count': 0,
+    'references': 0,
+    'year': None,
+}
+
+S2_PAPER_URL = (
+    "https://api.semanticscholar.org/graph/v1/paper/ARXIV:{arxiv_id}"
+    "?fields=citationCount,influentialCitationCount,referenceCount,year"
+)
+S2_BATCH_URL = (
+    "https://api.semanticscholar.org/graph/v1/paper/batch"
+    "?fields=citationCount,influentialCitationCount,referenceCount,year"
+)
+S2_BATCH_SIZE = 500                 # Maximum IDs accepted per batch request
+S2_TIMEOUT = 5                      # Seconds to wait for a single-paper lookup
+S2_BACKGROUND_TIMEOUT = (2, 2)      # Connect/read timeouts for a background lookup
+S2_BATCH_TIMEOUT = 30               # Seconds to wait for a batch lookup
+
+LLM_MODEL = 'gpt-4o-mini'
+LLM_TEMPERATURE = 0.1
+PROMPT_VERSION = 2                  # Bump whenever the prompt changes to invalidate cached queries
+LLM_CACHE_TTL = 30 * 24 * 3600
+EMBEDDING_MODEL = 'text-embedding-3-small'
+SEMANTIC_THRESHOLD = 0.95           # Minimum cosine similarity to reuse a cached query
+SEMANTIC_INDEX_SIZE = 256           # Most recent topics kept for semantic matching
+
+SYSTEM_PROMPT = """Convert the user's research topic into an arXiv API search query.
+Field prefixes: ti (title), au (author), abs (abstract), co (comment), jr (journal ref),
+cat (subject category), rn (report number), id, all (all fields).
+Boolean operators: AND, OR, ANDNOT. Group with %28 and %29, quote phrases with %22,
+replace spaces with +. Example: au:%22John+Doe%22+AND+ti:%28quantum+OR+computing%29
+Date filter: submittedDate:[YYYYMMDDHHMM+TO+YYYYMMDDHHMM]
+Reply with a JSON object: {"search_query": str, "max_results": 5-100,
+"sort_by": "relevance" or "lastUpdatedDate", "explanation": short str}"""
+
+
+def _citation_ttl(result):
+    """Cache hits for a week and 404s for a day; never cache transient errors"""
+    if 'error' in result:
+        return None
+    return CITATION_MISS_TTL if result.get('not_found') else CITATION_TTL
+
+
+def _citation_result(data):
+    """Convert a Semantic Scholar Graph API paper record into our citation data format"""
+    return {
+        'citation_count': data.get('citationCount') or 0,
+        'influential_citation_count': data.get('influentialCitationCount') or 0,
+        'references': data.get('referenceCount') or 0,
+        'year': data.get('year'),
+    }
+
+
+def _query_llm(user_query, client: OpenAI):
     """
-    Use an LLM to parse a natural language query into optimized arXiv API parameters.
+    Ask the LLM to convert a natural language query into arXiv API parameters.
     
     Args:
         user_query (str): Natural language query from user
-        llm_api_key (str): API key for the LLM service
+        client (OpenAI): OpenAI client used for the completion
         
     Returns:
         dict: Dictionary containing search parameters
+        bool: Whether the parameters came from the LLM (False for fallbacks)
     """
-
-    prompt = f"""
-        You are a search query generation assistant for the arXiv API. Your task is to convert natural language input into an arXiv search query string using the proper syntax, field prefixes, Boolean operators, and date range filters.
-
-        Key Points to Consider:
-
-        1. **Field Prefixes:**
-        - ti: Title
-        - au: Author
-        - abs: Abstract
-        - co: Comment
-        - jr: Journal Reference
-        - cat: Subject Category
-        - rn: Report Number
-        - id: ID (use id_list for multiple IDs)
-        - all: All fields
-
-        2. **Boolean Operators:**
-        - AND: Both conditions must be met.
-        - OR: Either condition can be met.
-        - ANDNOT: The first condition must be met, and the second must not be met.
-
-        3. **Date Filter:**
-        Format: submittedDate:[YYYYMMDDHHMM+TO+YYYYMMDDHHMM]
-        Example: submittedDate:[202301010000+TO+202401010000]
-
-        4. **Grouping:**
-        Use parentheses `%28` and `%29` to group Boolean expressions.
-        Example: au:"John Doe"+AND+ti:%28quantum+OR+computing%29
-
-        5. **Phrase Searching:**
-        Use double quotes `%22` to search for exact phrases within a field.
-        Example: ti:%22quantum+computing%22
-
-        6. **URL Encoding:**
-        - Replace spaces with `+`
-        - Encode special characters: quotes as `%22`, parentheses as `%28` and `%29`
-
-        Your response must be a JSON object with the following structure:
-        {{
-        "search_query": "<final arXiv query string>",
-        "max_results": <number between 5 and 100>,
-        "sort_by": "relevance" or "lastUpdatedDate",
-        "explanation": "<brief explanation of how the query was constructed>"
-        }}
-
-        Do not include any other text.
-
-        User query: "{user_query}"
-    """
-
-
     completion = client.chat.completions.create(
-        model='gpt-4o',
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.3, max_tokens=500,
+        model=LLM_MODEL,
+        response_format={"type": "json_object"},
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_query},
+        ],
+        temperature=LLM_TEMPERATURE, max_tokens=200,
     )
 
     try:
-        result = completion.choices[0].message.content
-        # Extract JSON from completion
-        json_match = re.search(r'\{.*\}', result, re.DOTALL)
-        if json_match:
-            import json
-            return json.loads(json_match.group(0))
-        else:
-            # Fallback to simple parsing
-            console.print("[bold yellow]Warning:[/bold yellow] Could not parse LLM response properly. Using fallback query.")
-            return {
-                "search_query": f'all:"{user_query}"',
-                "max_results": 30,
-                "sort_by": "relevance",
-                "explanation": "Fallback to simple all-fields search"
-            }
+        result = json.loads(completion.choices[0].message.content)
+        if not result.get("search_query"):
+            raise ValueError("response has no search_query")
+        return result, True
     except Exception as e:
         console.print(f"[bold red]Error parsing LLM response:[/bold red] [yellow]{str(e)}[/yellow]")
         return {
@@ -99,50 +109,167 @@ def parse_query_with_llm(user_query, client: OpenAI):
             "max_results": 30,
             "sort_by": "relevance",
             "explanation": "Error in LLM parsing"
-        }
+        }, False
+
+
+def _normalize_topic(topic):
+    """Lower-case and collapse whitespace so trivially different topics share a cache entry"""
+    return " ".join(topic.lower().split())
+
+
+def _embed_topic(topic, client: OpenAI):
+    """Return the unit-length embedding of a topic, or None if the request fails"""
+    try:
+        response = client.embeddings.create(model=EMBEDDING_MODEL, input=topic)
+    except Exception:
+        return None
+    vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else None
+
+
+def parse_query_with_llm(user_query, client: OpenAI):
+    """
+    Use an LLM to parse a natural language query into optimized arXiv API parameters.
+    
+    Results are cached in two tiers: an exact match on the normalized topic,
+    then a semantic match against the embeddings of previously parsed topics.
+    
+    Args:
+        user_query (str): Natural language query from user
+        client (OpenAI): OpenAI client used for the completion
+        
+    Returns:
+        dict: Dictionary containing search parameters
+    """
+    topic = _normalize_topic(user_query)
+    exact_key = cache.make_key('llm-query', topic, LLM_MODEL, LLM_TEMPERATURE, PROMPT_VERSION)
+    index_key = cache.make_key('llm-index', LLM_MODEL, LLM_TEMPERATURE, PROMPT_VERSION, EMBEDDING_MODEL)
+
+    # Exact match on the normalized topic
+    cached = cache.load(exact_key)
+    if cached is not None:
+        return dict(cached)
+
+    # Start the completion right away so a semantic miss costs one round trip, not two;
+    # on a semantic hit its answer is simply discarded
+    pool = ThreadPoolExecutor(max_workers=1)
+    completion = pool.submit(_query_llm, user_query, client)
+    pool.shutdown(wait=False)
 
-def get_citation_data(arxiv_id: str) -> dict:
+    # Semantic match against previously parsed topics
+    embedding = _embed_topic(topic, client) if cache.is_enabled() else None
+    if embedding is not None:
+        index = cache.load_index(index_key)
+        if index:
+            similarities = np.stack([np.frombuffer(vector, dtype=np.float32) for vector, _ in index]) @ embedding
+            best = int(np.argmax(similarities))
+            if similarities[best] >= SEMANTIC_THRESHOLD:
+                params = index[best][1]
+                cache.store(exact_key, params, LLM_CACHE_TTL)
+                return dict(params)
+
+    params, from_llm = completion.result()
+    if from_llm:
+        cache.store(exact_key, params, LLM_CACHE_TTL)
+        if embedding is not None:
+            cache.add_to_index(index_key, topic, embedding.tobytes(), params, LLM_CACHE_TTL,
+                               max_size=SEMANTIC_INDEX_SIZE)
+    return dict(params)
+
+
+@disk_cached('citations', ttl=_citation_ttl, ignore=('background',))
+def get_citation_data(arxiv_id: str, background: bool = False) -> dict:
     """
     Get citation data for an arXiv paper from Semantic Scholar.
 
     Args:
         arxiv_id (str): The arXiv ID of the paper
+        background (bool): Fetch for a background prefetch: no retries, a short
+            timeout and no error output
 
     Returns:
         dict: Citation data including count and influential citations
     """
 
-    url = (
-        f"https://api.semanticscholar.org/v1/paper/arXiv:{arxiv_id}"
-        "?fields=title,citationCount,influentialCitationCount,references,year"
-    )
-
-    default_result = {
-        'citation_count': 0,
-        'influential_citation_count': 0,
-        'references': 0,
-        'year': None,
-    }
+    url = S2_PAPER_URL.format(arxiv_id=arxiv_id)
 
     try:
-        response = requests.get(url)
+        if background:
+            response = _s2_background_session.get(url, timeout=S2_BACKGROUND_TIMEOUT)
+        else:
+            response = _s2_session.get(url, timeout=S2_TIMEOUT)
         response.raise_for_status()
-        data = response.json()
-
-        return {
-            'citation_count': len(data.get('citations', [])),
-            'influential_citation_count': data.get('influentialCitationCount', 0),
-            'references': len(data.get('references', [])),
-            'year': data.get('year'),
-        }
+        return _citation_result(response.json())
     except requests.RequestException as e:
-        # Create a better formatted error panel
-        error_message = f"Error fetching citation data for {arxiv_id}:\n{str(e)}"
-        console.print("\n")  # Add spacing before error
-        console.print(Panel(
-            f"[yellow]{str(e)}[/yellow]",
-            title=f"[bold red]Citation Data Error: {arxiv_id}[/bold red]",
-            border_style="red"
-        ))
-        console.print("\n")  # Add spacing after error
-        return default_result
+        if not background:
+            # Create a better formatted error panel
+            error_message = f"Error fetching citation data for {arxiv_id}:\n{str(e)}"
+            console.print("\n")  # Add spacing before error
+            console.print(Panel(
+                f"[yellow]{str(e)}[/yellow]",
+                title=f"[bold red]Citation Data Error: {arxiv_id}[/bold red]",
+                border_style="red"
+            ))
+            console.print("\n")  # Add spacing after error
+
+        # Mark papers unknown to Semantic Scholar so the miss can be cached
+        if getattr(e.response, 'status_code', None) == 404:
+            return {**DEFAULT_CITATION_DATA, 'not_found': True}
+        return {**DEFAULT_CITATION_DATA, 'error': str(e)}
+
+
+def get_citation_data_batch(arxiv_ids: list[str]) -> dict[str, dict]:
+    """
+    Get citation data for many arXiv papers using Semantic Scholar's batch endpoint.
+
+    Cached entries are reused; the remaining IDs are fetched with one POST
+    request per 500 papers instead of one request per paper.
+
+    Args:
+        arxiv_ids (list[str]): The arXiv IDs of the papers
+
+    Returns:
+        dict[str, dict]: Citation data keyed by arXiv ID, in the same format as get_citation_data
+    """
+    results = {}
+    missing = []
+    for arxiv_id in dict.fromkeys(arxiv_ids):
+        cached = cache.load(cache.call_key('citations', arxiv_id))
+        if cached is not None:
+            results[arxiv_id] = cached
+        else:
+            missing.append(arxiv_id)
+
+    for start in range(0, len(missing), S2_BATCH_SIZE):
+        chunk = missing[start:start + S2_BATCH_SIZE]
+        try:
+            response = _s2_session.post(
+                S2_BATCH_URL,
+                json={'ids': [f"ARXIV:{arxiv_id}" for arxiv_id in chunk]},
+                timeout=S2_BATCH_TIMEOUT
+            )
+            response.raise_for_status()
+            entries = response.json()
+        except requests.RequestException as e:
+            console.print("\n")  # Add spacing before error
+            console.print(Panel(
+                f"[yellow]{str(e)}[/yellow]",
+                title=f"[bold red]Citation Data Error: {len(chunk)} papers[/bold red]",
+                border_style="red"
+            ))
+            console.print("\n")  # Add spacing after error
+            for arxiv_id in chunk:
+                results[arxiv_id] = {**DEFAULT_CITATION_DATA, 'error': str(e)}
+            continue
+
+        # Entries are returned in request order, with null for unknown papers
+        for arxiv_id, data in zip(chunk, entries):
+            if data is None:
+                result = {**DEFAULT_CITATION_DATA, 'not_found': True}
+            else:
+                result = _citation_result(data)
+            cache.store(cache.call_key('citations', arxiv_id), result, _citation_ttl(result))
+            results[arxiv_id] = result
+
+    return results
@@ -0,0 +1,29 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def build_session(pool_size=16, retries=3) -> requests.Session:
+    """
+    Create a requests session that keeps connections alive and retries transient failures.
+
+    Args:
+        pool_size (int): Number of connections kept open per host
+        retries (int): Retries for connection errors and 429/5xx responses
+
+    Returns:
+        requests.Session: Session with pooled HTTP and HTTPS adapters
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset({'GET', 'POST'}),  # POSTs here are read-only lookups
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -1,40 +1,65 @@
-import time
-from utils.helpers import get_citation_data
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import TfidfVectorizer
+import datetime
+import numpy as np
+from utils.helpers import get_citation_data_batch
+from utils.ranking_kernels import score_kernel
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeElapsedColumn
 
-def rank_papers(papers, user_query, use_citations=True, external_progress=None):
+# The hashing vectorizer needs no fit, so one instance serves every search
+_hashing_vectorizer = None
+
+def _tfidf_transform(texts):
+    """
+    Convert texts to L2-normalized TF-IDF vectors, with IDF weights fitted on these texts.
+    
+    Args:
+        texts (list): Texts to vectorize
+        
+    Returns:
+        scipy.sparse.csr_matrix: One float32 TF-IDF row per text
+    """
+    global _hashing_vectorizer
+    from sklearn.feature_extraction.text import TfidfTransformer
+    
+    if _hashing_vectorizer is None:
+        from sklearn.feature_extraction.text import HashingVectorizer
+        _hashing_vectorizer = HashingVectorizer(
+            n_features=2**15, stop_words='english', alternate_sign=False, norm=None, dtype=np.float32
+        )
+    counts = _hashing_vectorizer.transform(texts)
+    return TfidfTransformer(norm='l2').fit_transform(counts)
+
+def rank_papers(papers, user_query, use_citations=True, external_progress=None, top_k=None):
     """
     Rank papers based on multiple signals including relevance and citations.
     
     Args:
-        papers (list): List of paper dictionaries
+        papers (list[Paper]): List of papers from query_arxiv
         user_query (str): Original user query
         use_citations (bool): Whether to incorporate citation data
         external_progress: An existing Progress object to use instead of creating a new one
+        top_k (int): Only return the top_k best papers (all papers if None)
         
     Returns:
-        list: List of paper dictionaries ranked by combined score
+        list[Paper]: Papers ranked by combined score
     """
     if not papers:
         return []
     
-    # Calculate text similarity scores
-    abstracts = [paper['abstract'] for paper in papers]
-    titles = [paper['title'] for paper in papers]
+    current_year = datetime.datetime.now().year
     
-    # Create TF-IDF vectorizers
-    abstract_vectorizer = TfidfVectorizer(stop_words='english')
-    title_vectorizer = TfidfVectorizer(stop_words='english')
+    # Calculate text similarity scores
+    abstracts = [paper.abstract for paper in papers]
+    titles = [paper.title for paper in papers]
     
-    # Fit and transform
-    abstract_matrix = abstract_vectorizer.fit_transform(abstracts + [user_query])
-    title_matrix = title_vectorizer.fit_transform(titles + [user_query])
+    # Vectorize abstracts, titles and the query together
+    n = len(papers)
+    matrix = _tfidf_transform(abstracts + titles + [user_query])
+    query_vector = matrix[-1]
     
-    # Calculate similarities
-    abstract_similarities = cosine_similarity(abstract_matrix[-1], abstract_matrix[:-1]).flatten()
-    title_similarities = cosine_similarity(title_matrix[-1], title_matrix[:-1]).flatten()
+    # Rows are L2-normalized, so cosine similarity is a plain dot product
+    similarities = (matrix[:-1] @ query_vector.T).toarray().ravel()
+    abstract_similarities = similarities[:n]
+    title_similarities = similarities[n:]
     
     # Fetch citation data if requested
     if use_citations:
@@ -65,60 +90,50 @@ def rank_papers(papers, user_query, use_citations=True, external_progress=None):
             citation_task = progress_obj.add_task("Fetching citations", total=len(papers))
         
         try:
-            # Fetch citations with progress updates
-            for i, paper in enumerate(papers):
-                try:
-                    progress_obj.update(citation_task, completed=i+1, 
-                                      description=f"[bold magenta]Fetching citation data...[/bold magenta] Paper {i+1}/{len(papers)}")
-                    papers[i]['citation_data'] = get_citation_data(paper['id'])
-                except Exception as e:
-                    papers[i]['citation_data'] = {'citation_count': 0, 'error': f"[bold orange1]Failed to fetch: {str(e)}[/bold orange1]"}
-                
-                # Add a small delay to avoid rate limiting
-                time.sleep(0.5)
+            # Fetch all citations with batched requests
+            citations = get_citation_data_batch([paper.id for paper in papers])
+            for paper in papers:
+                paper.citation_data = citations[paper.id]
+            progress_obj.update(citation_task, completed=len(papers))
         finally:
             # Only exit the context if we created our own progress object
             if not external_progress:
                 progress_obj.__exit__(None, None, None)  # Close the progress context
     
+    # Gather the per-paper signals into arrays for the scoring kernel
+    if use_citations:
+        citations = np.fromiter(
+            ((paper.citation_data or {}).get('citation_count', 0) for paper in papers),
+            dtype=np.float32, count=n
+        )
+    else:
+        citations = np.zeros(n, dtype=np.float32)
+    max_citations = max(citations.max(), 1)
+    years = np.fromiter((int(paper.published[:4]) for paper in papers), dtype=np.int32, count=n)
+    
     # Calculate combined scores
-    scored_papers = []
+    relevance, citation, recency, combined = score_kernel(
+        title_similarities, abstract_similarities,
+        citations, np.float32(max_citations), years, current_year
+    )
+    
+    # Store the scores for explanation purposes
     for i, paper in enumerate(papers):
-        # Base relevance score (weighted combination of title and abstract similarity)
-        relevance_score = (0.6 * title_similarities[i]) + (0.4 * abstract_similarities[i])
-        
-        # Citation score (normalized)
-        citation_score = 0
-        if use_citations and 'citation_data' in paper:
-            # Get the max citation count for normalization
-            max_citations = max([p.get('citation_data', {}).get('citation_count', 0) for p in papers]) or 1
-            citation_count = paper['citation_data'].get('citation_count', 0)
-            
-            # Normalize citation count
-            citation_score = citation_count / max_citations
-        
-        # Recency score (favor newer papers slightly)
-        import datetime
-        current_year = datetime.datetime.now().year
-        pub_year = int(paper['published'][:4])
-        recency_score = 1 - ((current_year - pub_year) / 10)  # Decay over 10 years
-        recency_score = max(0, min(1, recency_score))  # Clamp between 0 and 1
-        
-        # Combined score with weights
-        combined_score = (0.5 * relevance_score) + (0.4 * citation_score) + (0.1 * recency_score)
-        
-        # Store the scores for explanation purposes
-        paper['scores'] = {
-            'relevance': relevance_score,
-            'citation': citation_score,
-            'recency': recency_score,
-            'combined': combined_score
+        paper.scores = {
+            'relevance': float(relevance[i]),
+            'citation': float(citation[i]),
+            'recency': float(recency[i]),
+            'combined': float(combined[i])
         }
-        
-        scored_papers.append((paper, combined_score))
     
     # Sort by combined score (descending)
-    scored_papers.sort(key=lambda x: x[1], reverse=True)
+    k = n if top_k is None else min(n, top_k)
+    if n > 2 * k:
+        # Partial sort: select the top k in O(n), then order just those
+        order = np.argpartition(-combined, k - 1)[:k]
+        order = order[np.argsort(-combined[order], kind='stable')]
+    else:
+        order = np.argsort(-combined, kind='stable')[:k]
     
     # Return the ranked papers
-    return [paper for paper, _ in scored_papers]
\ No newline at end of file
+    return [papers[i] for i in order]
\ No newline at end of file
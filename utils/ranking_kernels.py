@@ -0,0 +1,30 @@
+import numpy as np
+
+
+def score_kernel(title_sim, abs_sim, cites, max_cite, years, current_year):
+    """
+    Compute the ranking scores for every paper as whole-array numpy operations.
+
+    Args:
+        title_sim (np.ndarray): Title similarity to the query, per paper
+        abs_sim (np.ndarray): Abstract similarity to the query, per paper
+        cites (np.ndarray): Citation count per paper
+        max_cite (float): Citation count used for normalization (non-zero)
+        years (np.ndarray): Publication year per paper
+        current_year (int): Year recency is measured against
+
+    Returns:
+        np.ndarray: Array of shape (4, n) holding the relevance, citation,
+            recency and combined scores
+    """
+    # Base relevance score (weighted combination of title and abstract similarity)
+    relevance = 0.6 * title_sim + 0.4 * abs_sim
+
+    # Citation score (normalized)
+    citation = cites / max_cite
+
+    # Recency score (favor newer papers slightly), decaying over 10 years
+    recency = np.clip(1.0 - (current_year - years) / 10.0, 0.0, 1.0)
+
+    combined = 0.5 * relevance + 0.4 * citation + 0.1 * recency
+    return np.stack([relevance, citation, recency, combined]).astype(np.float32)